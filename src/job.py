@@ -1,22 +1,35 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Dict, Literal
+from typing import Annotated, Any, Dict, Literal, Union
+
+from pydantic import BaseModel, ConfigDict, Field
 
-from pydantic import BaseModel, Field
+# pydantic requires the typing_extensions backport of TypedDict on python < 3.12
+from typing_extensions import TypedDict
 
-ComfyWorkflow = Dict
+# The workflow graph is deliberately opaque: values are Any, so validation is
+# a single isinstance check and never recurses into the node structure
+ComfyWorkflow = Dict[str, Any]
 
 
-class ComfyImageInput(BaseModel):
-    name: str = Field(description="The name of the image")
-    image: str = Field(description="The base64 encoded image")
+# The input leaves are TypedDicts rather than models: pydantic-core validates
+# them as plain dicts, without allocating a model instance per list element
+class ComfyImageInput(TypedDict):
+    name: Annotated[str, Field(description="The name of the image")]
+    image: Annotated[Union[str, bytes], Field(description="The base64 encoded image, or the raw image bytes")]
 
 
-class ComfyFileUrlInput(BaseModel):
-    name: str = Field(description="The name of the file")
-    url: str = Field(description="The url of the file")
+class ComfyFileUrlInput(TypedDict):
+    name: Annotated[str, Field(description="The name of the file")]
+    url: Annotated[str, Field(description="The url of the file")]
 
 
 class ComfyOutput(BaseModel):
+    # instances that were validated once are passed through untouched, never
+    # deep-copied or re-walked when assigned into a parent model
+    model_config = ConfigDict(revalidate_instances="never")
+
     type: Literal["s3", "url"] = Field(description="The output type")
     bucket: str = Field(description="The bucket to store the output")
     endpoint_url: str = Field(description="The endpoint url")
@@ -26,6 +39,8 @@ class ComfyOutput(BaseModel):
 class JobTrigger(BaseModel):
     "Define the trigger after the job has completed"
 
+    model_config = ConfigDict(revalidate_instances="never")
+
     service: str = Field(description="The service to trigger")
     multiple_result: bool = Field(
         default=False,
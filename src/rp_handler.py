@@ -1,59 +1,137 @@
 import base64
-import json
+import errno
+import hashlib
 import os
+import random
+import select
+import socket
 import time
 import urllib.parse
-import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import List, Optional, Union
+from typing import List, Optional
 
-import requests
-import runpod
-from boto3 import session
-from botocore.config import Config
-from pydantic import BaseModel, Field, ValidationError
-from requests_toolbelt import MultipartEncoder
-from requests_toolbelt.multipart.encoder import FileFromURLWrapper
-from runpod.serverless.utils import rp_upload
+import jsonschema
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 
 from .job import ComfyFileUrlInput, ComfyImageInput, ComfyOutput, ComfyWorkflow
-from .supabase import SupabaseJobTrigger
-from .trigger import create_trigger_handler
+from .trigger import ComfyJobTrigger, create_trigger_handler
 
 # Time to wait between API check attempts in milliseconds
 COMFY_API_AVAILABLE_INTERVAL_MS = 50
 # Maximum number of API check attempts
 COMFY_API_AVAILABLE_MAX_RETRIES = 500
 # Time to wait between poll attempts in milliseconds
-COMFY_POLLING_INTERVAL_MS = os.environ.get("COMFY_POLLING_INTERVAL_MS", 250)
+COMFY_POLLING_INTERVAL_MS = int(os.environ.get("COMFY_POLLING_INTERVAL_MS", "250"))
 # Maximum number of poll attempts
-COMFY_POLLING_MAX_RETRIES = os.environ.get("COMFY_POLLING_MAX_RETRIES", 5000)
+COMFY_POLLING_MAX_RETRIES = int(os.environ.get("COMFY_POLLING_MAX_RETRIES", "5000"))
+# Total wall-clock budget for the completion wait, equivalent to the
+# retries * interval product of the old fixed-interval loop
+_POLL_DEADLINE_S = COMFY_POLLING_MAX_RETRIES * COMFY_POLLING_INTERVAL_MS / 1000.0
+# Exponential backoff settings for the poll loop: the delay starts at
+# POLL_MIN_MS, grows by POLL_BASE per attempt and is capped at POLL_MAX_MS
+POLL_BASE = 1.3
+POLL_MIN_MS = 50
+POLL_MAX_MS = 2000
 # Host where ComfyUI is running
 COMFY_HOST = "127.0.0.1:8188"
+# Wait for job completion over the ComfyUI websocket instead of polling /history
+COMFY_USE_WS = os.environ.get("COMFY_USE_WS", "true").lower() == "true"
+# Request targets and headers interpolated once instead of per call
+_HISTORY_URL_PREFIX = f"http://{COMFY_HOST}/history/"
+_PROMPT_URL = f"http://{COMFY_HOST}/prompt"
+_UPLOAD_IMAGE_URL = f"http://{COMFY_HOST}/upload/image"
+_JSON_HEADERS = {"Content-Type": "application/json"}
 # Enforce a clean state after each job is done
 # see https://docs.runpod.io/docs/handler-additional-controls#refresh-worker
 REFRESH_WORKER = os.environ.get("REFRESH_WORKER", "false").lower() == "true"
+# Number of files uploaded to the s3 bucket concurrently
+S3_UPLOAD_CONCURRENCY = int(os.environ.get("S3_UPLOAD_CONCURRENCY", "16"))
+# Number of multipart chunks uploaded concurrently for a single large file
+S3_PART_CONCURRENCY = int(os.environ.get("S3_PART_CONCURRENCY", "8"))
 
+# boto3 TransferConfig shared by every s3 upload, built lazily with the client
+_TRANSFER_CONFIG = None
 
-class ComfyWorkerJob(BaseModel):
-    "Define the input for the worker job"
+# s3 clients cached per endpoint/credentials, see _get_s3_client
+_S3_CLIENTS = {}
+
+# Shared session so every request to the Comfy server reuses a pooled
+# keep-alive connection instead of paying a TCP handshake per call; built
+# lazily so importing the module for validation alone never loads requests
+_SESSION = None
+
+
+def _get_session():
+    "return the shared keep-alive session, building it on first use"
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter, Retry
+
+        session = requests.Session()
+        session.mount(
+            "http://",
+            HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=Retry(total=3, backoff_factor=0.1)),
+        )
+        _SESSION = session
+    return _SESSION
+
+
+class ComfyWorkerJobInput(BaseModel):
+    "Define the input payload for the worker job"
+
+    # never deep-copy or re-walk sub-model instances that were already validated
+    model_config = ConfigDict(revalidate_instances="never")
 
-    id: str = Field(..., description="The job id")
     workflow: ComfyWorkflow = Field(..., description="The workflow to run")
     images: Optional[List[ComfyImageInput]] = Field(default=None, description="The images to use")
     file_urls: Optional[List[ComfyFileUrlInput]] = Field(default=None, description="The file urls to use")
     output: Optional[ComfyOutput] = Field(default=None, description="The output configuration")
-    trigger: Optional[Union[SupabaseJobTrigger]] = Field(
-        default=None, description="The trigger configuration", discriminator="service"
-    )
+    trigger: Optional[ComfyJobTrigger] = Field(default=None, description="The trigger configuration")
+
+
+class ComfyWorkerJob(ComfyWorkerJobInput):
+    "Define the input for the worker job"
+
+    # Frozen: the handler only ever reads the job, so one instance can be
+    # shared across threads and session-scoped fixtures without defensive
+    # copies. Derive changed copies with model_copy(update=...). Note that
+    # instances are still unhashable - the workflow dict inside them is not.
+    model_config = ConfigDict(revalidate_instances="never", frozen=True)
+
+    id: str = Field(..., description="The job id")
+
+
+# Compiled once at import and reused for every validation
+_INPUT_ADAPTER = TypeAdapter(ComfyWorkerJobInput)
+_BATCH_ADAPTER = TypeAdapter(List[ComfyWorkerJobInput])
+
+# pydantic treats the workflow graph as an opaque dict, so its coarse shape
+# (node id -> node object carrying a class_type) is checked by a JSON Schema
+# validator compiled once at import and reused for every job
+_WORKFLOW_VALIDATOR = jsonschema.Draft202012Validator(
+    {
+        "type": "object",
+        "additionalProperties": {
+            "type": "object",
+            "required": ["class_type"],
+        },
+    }
+)
 
 
 def validate_input(job_input):
     """
-    Deprecated. Use pydantic model for input validation.
-
     Validates the input for the handler function.
 
+    The checks run through the compiled ComfyWorkerJobInput validator in
+    pydantic-core instead of the previous hand-written python loops; the
+    tuple contract is kept for existing callers. The handler itself
+    validates through ComfyWorkerJob directly.
+
     Args:
         job_input (dict): The input data to validate.
 
@@ -65,60 +143,59 @@ def validate_input(job_input):
     if job_input is None:
         return None, "Please provide input"
 
-    # Check if input is a string and try to parse it as JSON
-    if isinstance(job_input, str):
-        try:
-            job_input = json.loads(job_input)
-        except json.JSONDecodeError:
+    # An already-validated model passes straight through instead of paying
+    # for a second recursive validation of the same data
+    if isinstance(job_input, ComfyWorkerJobInput):
+        return job_input.model_dump(), None
+
+    try:
+        if isinstance(job_input, (str, bytes)):
+            # parse + validate in one pydantic-core pass, no intermediate dict
+            validated = _INPUT_ADAPTER.validate_json(job_input)
+        else:
+            validated = _INPUT_ADAPTER.validate_python(job_input)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
             return None, "Invalid JSON format in input"
+        return None, str(e)
 
-    # Validate 'workflow' in input
-    workflow = job_input.get("workflow")
-    if workflow is None:
-        return None, "Missing 'workflow' parameter"
-
-    # Validate 'images' in input, if provided
-    images = job_input.get("images")
-    if images is not None:
-        if not isinstance(images, list) or not all("name" in image and "image" in image for image in images):
-            return (
-                None,
-                "'images' must be a list of objects with 'name' and 'image' keys",
-            )
-
-    # Validate 'file_urls' in input, if provided
-    file_urls = job_input.get("file_urls")
-    if file_urls is not None:
-        if not isinstance(file_urls, list) or not all(
-            "name" in file_url and "url" in file_url for file_url in file_urls
-        ):
-            return (
-                None,
-                "'file_urls' must be a list of objects with 'name' and 'url' keys",
-            )
-    # Validate 'output' in input, if provided
-    output = job_input.get("output")
-    if output is not None:
-        if not isinstance(output, dict) or not (
-            "type" in output and "bucket" in output and "endpoint_url" in output and "key_prefix" in output
-        ):
-            return (
-                None,
-                "'output' must be a dictionary with 'type', 'bucket', 'endpoint_url' and 'key_prefix' keys",
-            )
+    workflow_error = next(_WORKFLOW_VALIDATOR.iter_errors(validated.workflow), None)
+    if workflow_error is not None:
+        return None, f"Invalid workflow: {workflow_error.message}"
 
     # Return validated data and no error
-    return {
-        "workflow": workflow,
-        "images": images,
-        "file_urls": file_urls,
-        "output": output,
-    }, None
+    return validated.model_dump(), None
+
+
+def validate_input_batch(job_inputs):
+    """
+    Validates a list of job inputs in a single pydantic-core call.
+
+    The whole batch crosses into the compiled validator once instead of
+    paying one dispatch per item, so callers holding several queued jobs
+    should prefer this over looping validate_input. The tuple contract
+    mirrors validate_input: (validated_list, error_message).
+    """
+    if job_inputs is None:
+        return None, "Please provide input"
+
+    try:
+        validated = _BATCH_ADAPTER.validate_python(job_inputs)
+    except ValidationError as e:
+        return None, str(e)
+
+    return [item.model_dump() for item in validated], None
 
 
 def check_server(url, retries=500, delay=50):
     """
-    Check if a server is reachable via HTTP GET request
+    Check if a server is reachable
+
+    A raw TCP connect is used as the cheap readiness probe: one non-blocking
+    socket is driven through select() so a pending connect is reused across
+    attempts instead of being torn down and redialed. Only once the port
+    accepts a connection does a single HTTP GET confirm that the HTTP layer
+    actually answers with a 200.
 
     Args:
     - url (str): The URL to check
@@ -128,20 +205,60 @@ def check_server(url, retries=500, delay=50):
     Returns:
     bool: True if the server is reachable within the given number of retries, otherwise False
     """
-    for i in range(retries):
-        try:
-            response = requests.get(url)
+    import requests
 
-            # If the response status code is 200, the server is up and running
-            if response.status_code == 200:
-                print("runpod-worker-comfy - API is reachable")
-                return True
-        except requests.RequestException:
-            # If an exception occurs, the server may not be ready
-            pass
+    parsed = urllib.parse.urlparse(url)
+    addr = (parsed.hostname or "127.0.0.1", parsed.port or 80)
 
-        # Wait for the specified delay before retrying
-        time.sleep(delay / 1000)
+    probe = None
+    try:
+        for i in range(retries):
+            if probe is None:
+                probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                probe.setblocking(False)
+
+            rc = probe.connect_ex(addr)
+            if rc in (0, errno.EISCONN):
+                connected = True
+            elif rc in (errno.EINPROGRESS, errno.EALREADY, errno.EWOULDBLOCK):
+                # wait on the in-flight connect instead of sleeping blindly
+                _, writable, _ = select.select([], [probe], [], delay / 1000)
+                connected = bool(writable) and probe.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                if writable and not connected:
+                    # the async connect failed: like the synchronous failure
+                    # below, the socket cannot be redialed, start fresh
+                    probe.close()
+                    probe = None
+                    time.sleep(delay / 1000)
+            else:
+                # definitive failure (e.g. connection refused): that socket
+                # cannot be redialed, start fresh after the usual delay
+                probe.close()
+                probe = None
+                connected = False
+                time.sleep(delay / 1000)
+
+            if connected:
+                # release the probe connection before talking HTTP, so the
+                # server never holds an idle connection on our account
+                probe.close()
+                probe = None
+                try:
+                    response = _get_session().get(url)
+
+                    # If the response status code is 200, the server is up and running
+                    if response.status_code == 200:
+                        print("runpod-worker-comfy - API is reachable")
+                        return True
+                except requests.RequestException:
+                    # If an exception occurs, the server may not be ready
+                    pass
+
+                # Wait for the specified delay before retrying
+                time.sleep(delay / 1000)
+    finally:
+        if probe is not None:
+            probe.close()
 
     print(f"runpod-worker-comfy - Failed to connect to server at {url} after {retries} attempts.")
     return False
@@ -161,28 +278,43 @@ def upload_images(images: List[ComfyImageInput]):
     if not images:
         return {"status": "success", "message": "No images to upload", "details": []}
 
-    responses = []
-    upload_errors = []
+    from requests_toolbelt import MultipartEncoder
 
-    print("runpod-worker-comfy - image(s) upload")
+    session = _get_session()
 
-    for image in images:
-        name = image.name
-        image_data = image.image
-        blob = base64.b64decode(image_data)
+    print("runpod-worker-comfy - image(s) upload")
 
-        # Prepare the form data
-        files = {
-            "image": (name, BytesIO(blob), "image/png"),
-            "overwrite": (None, "true"),
-        }
+    def _upload_one(image: ComfyImageInput):
+        name = image["name"]
+        image_data = image["image"]
+        # raw bytes are posted as-is, only base64 strings need decoding
+        blob = image_data if isinstance(image_data, bytes) else base64.b64decode(image_data)
+
+        # Stream the multipart body instead of letting requests buffer a
+        # second copy of the blob
+        encoder = MultipartEncoder(
+            fields={
+                "image": (name, BytesIO(blob), "image/png"),
+                "overwrite": "true",
+            }
+        )
 
         # POST request to upload the image
-        response = requests.post(f"http://{COMFY_HOST}/upload/image", files=files)
+        response = session.post(
+            _UPLOAD_IMAGE_URL,
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+        )
         if response.status_code != 200:
-            upload_errors.append(f"Error uploading {name}: {response.text}")
-        else:
-            responses.append(f"Successfully uploaded {name}")
+            return (False, f"Error uploading {name}: {response.text}")
+        return (True, f"Successfully uploaded {name}")
+
+    # the uploads are network bound and independent, so run them concurrently
+    with ThreadPoolExecutor(max_workers=min(8, len(images))) as executor:
+        results = list(executor.map(_upload_one, images))
+
+    responses = [detail for ok, detail in results if ok]
+    upload_errors = [detail for ok, detail in results if not ok]
 
     if upload_errors:
         print("runpod-worker-comfy - image(s) upload with errors")
@@ -213,16 +345,18 @@ def upload_files_from_url(file_urls: List[ComfyFileUrlInput]):
 
     if not file_urls:
         return {"status": "success", "message": "No files to upload", "details": []}
-    responses = []
-    upload_errors = []
 
-    for file_url in file_urls:
-        name = file_url.name
-        url = file_url.url
+    import requests
+    from requests_toolbelt import MultipartEncoder
+    from requests_toolbelt.multipart.encoder import FileFromURLWrapper
+
+    session = _get_session()
+
+    def _upload_one(file_url: ComfyFileUrlInput):
+        name = file_url["name"]
+        url = file_url["url"]
         print(f"runpod-worker-comfy - downloading {name} from {url}")
         try:
-            session = requests.Session()
-
             encoder = MultipartEncoder(
                 fields={
                     "image": (
@@ -233,21 +367,27 @@ def upload_files_from_url(file_urls: List[ComfyFileUrlInput]):
                     "overwrite": "true",
                 }
             )
-            response = requests.post(
-                f"http://{COMFY_HOST}/upload/image",
+            response = session.post(
+                _UPLOAD_IMAGE_URL,
                 data=encoder,
                 headers={"Content-Type": encoder.content_type},
             )
             if response.status_code != 200:
                 print(f"runpod-worker-comfy - Error uploading {name}: [{response.status_code}] {response.text}")
-                upload_errors.append(f"Error uploading {name}: [{response.status_code}] {response.text}")
-            else:
-                responses.append(f"Successfully uploaded {name}")
+                return (False, f"Error uploading {name}: [{response.status_code}] {response.text}")
+            return (True, f"Successfully uploaded {name}")
 
         except requests.RequestException as e:
             print(f"runpod-worker-comfy - Error downloading {name}: {str(e)}")
-            upload_errors.append(f"Error downloading {name}: {str(e)}")
-            continue
+            return (False, f"Error downloading {name}: {str(e)}")
+
+    # each worker spends its time waiting on the remote server, so the
+    # download+upload pipelines overlap almost perfectly
+    with ThreadPoolExecutor(max_workers=min(8, len(file_urls))) as executor:
+        results = list(executor.map(_upload_one, file_urls))
+
+    responses = [detail for ok, detail in results if ok]
+    upload_errors = [detail for ok, detail in results if not ok]
 
     if upload_errors:
         print("runpod-worker-comfy - file(s) upload with errors")
@@ -264,22 +404,89 @@ def upload_files_from_url(file_urls: List[ComfyFileUrlInput]):
     }
 
 
-def queue_workflow(workflow):
+def queue_workflow(workflow, client_id=None):
     """
     Queue a workflow to be processed by ComfyUI
 
     Args:
         workflow (dict): A dictionary containing the workflow to be processed
+        client_id (str, optional): Identifier of the websocket connection, so
+                                   ComfyUI pushes execution events for this
+                                   prompt to that connection
 
     Returns:
         dict: The JSON response from ComfyUI after processing the workflow
     """
 
     # The top level element "prompt" is required by ComfyUI
-    data = json.dumps({"prompt": workflow}).encode("utf-8")
+    payload = {"prompt": workflow}
+    if client_id:
+        payload["client_id"] = client_id
+
+    response = _get_session().post(_PROMPT_URL, data=orjson.dumps(payload), headers=_JSON_HEADERS)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def connect_websocket(client_id):
+    """
+    Open a websocket connection to the ComfyUI event stream.
+
+    Args:
+        client_id (str): Identifier to register with, the same id must be sent
+                         along with the queued prompt
+
+    Returns:
+        The connected websocket, or None if the connection could not be made
+        (the caller should fall back to history polling).
+    """
+    try:
+        from websockets.sync.client import connect
 
-    req = urllib.request.Request(f"http://{COMFY_HOST}/prompt", data=data)
-    return json.loads(urllib.request.urlopen(req).read())
+        return connect(f"ws://{COMFY_HOST}/ws?clientId={client_id}", open_timeout=5)
+    except Exception as e:
+        print(f"runpod-worker-comfy - websocket connection failed ({e}), falling back to history polling")
+        return None
+
+
+def wait_for_completion_ws(ws, prompt_id, deadline):
+    """
+    Wait on the websocket until ComfyUI reports the given prompt as finished.
+
+    ComfyUI pushes an "executing" event with node=None when a prompt has
+    completed, and an "execution_error" event when it failed, so there is no
+    poll latency at all.
+
+    Args:
+        ws: The connected websocket
+        prompt_id (str): The ID of the queued prompt to wait for
+        deadline (float): time.monotonic() timestamp after which to give up
+
+    Returns:
+        str | None: An error message if the execution failed, None on success
+
+    Raises:
+        TimeoutError: If the deadline passes before a completion event arrives
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Timed out waiting for completion event")
+
+        message = ws.recv(timeout=remaining)
+        if not isinstance(message, str):
+            # binary frames carry preview images, not execution events
+            continue
+
+        event = orjson.loads(message)
+        data = event.get("data", {})
+        if data.get("prompt_id") != prompt_id:
+            continue
+
+        if event.get("type") == "executing" and data.get("node") is None:
+            return None
+        if event.get("type") == "execution_error":
+            return data.get("exception_message", "execution_error")
 
 
 def get_history(prompt_id):
@@ -292,45 +499,56 @@ def get_history(prompt_id):
     Returns:
         dict: The history of the prompt, containing all the processing steps and results
     """
-    with urllib.request.urlopen(f"http://{COMFY_HOST}/history/{prompt_id}") as response:
-        return json.loads(response.read())
+    response = _get_session().get(_HISTORY_URL_PREFIX + prompt_id)
+    response.raise_for_status()
+    return orjson.loads(response.content)
 
 
 def base64_encode(img_path):
     """
     Returns base64 encoded image.
 
+    The file is encoded in chunks so only a small buffer is resident at a
+    time, instead of the whole image plus its ~1.33x encoded form.
+
     Args:
         img_path (str): The path to the image
 
     Returns:
         str: The base64 encoded image
     """
+    encoded = bytearray()
     with open(img_path, "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode("utf-8")
-        return f"{encoded_string}"
+        # chunk size is a multiple of 57 bytes (-> 76 base64 chars), so no
+        # padding is emitted mid-stream
+        while chunk := image_file.read(57 * 1024):
+            encoded += base64.b64encode(chunk)
+    return encoded.decode("ascii")
 
 
-def check_file_path_exist(paths: list[str]) -> tuple[bool, list[str]]:
+def scan_existing_files(paths: list[str]) -> set[str]:
     """
-    Returns whether the given list of file paths exist.
+    Returns the subset of the given file paths that exist on disk.
+
+    Each distinct parent folder is listed once with os.scandir and the paths
+    are checked against the resulting name sets, so the syscall count scales
+    with the number of folders instead of one stat() per path.
+
     Args:
         paths (list[str]): list of file paths
 
     Returns:
-        tuple:
-            bool: True if all files exist, False otherwise
-            list[str]: list of file paths that do exist
-    """
-    is_all_exist: bool = True
-    path_exists = []
-    for path in paths:
-        if not os.path.exists(path):
-            is_all_exist = False
-        else:
-            path_exists.append(path)
+        set[str]: the paths that do exist
+    """
+    names_by_folder = {}
+    for folder in {os.path.dirname(path) for path in paths}:
+        try:
+            with os.scandir(folder) as entries:
+                names_by_folder[folder] = {entry.name for entry in entries}
+        except OSError:
+            names_by_folder[folder] = set()
 
-    return (is_all_exist, path_exists)
+    return {path for path in paths if os.path.basename(path) in names_by_folder[os.path.dirname(path)]}
 
 
 def is_an_output_file(output):
@@ -348,6 +566,64 @@ def is_an_output_file(output):
     return False
 
 
+def _get_s3_client(endpoint_url: str, access_key: str, secret_key: str):
+    """
+    Returns a cached s3 client for the given endpoint and credentials.
+
+    Creating a boto3 client parses the service model and negotiates a fresh
+    connection pool, which costs 50-200 ms per job when done inline, so the
+    clients are cached at module scope. The secret key is hashed before being
+    used in the cache key so it is never retained as a plain dict key.
+    """
+    cache_key = (endpoint_url, access_key, hashlib.sha256(secret_key.encode()).hexdigest())
+    client = _S3_CLIENTS.get(cache_key)
+    if client is None:
+        # boto3/botocore are only imported once a job actually uploads to s3,
+        # keeping them off the cold-start path
+        from boto3 import session
+        from botocore.config import Config
+
+        config = Config(
+            signature_version="s3v4",
+            retries={"max_attempts": 3, "mode": "adaptive"},
+            max_pool_connections=32,
+            tcp_keepalive=True,
+        )
+        client_session = session.Session()
+        client = client_session.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=config,
+        )
+        _S3_CLIENTS[cache_key] = client
+    return client
+
+
+def _get_transfer_config():
+    """
+    Returns the shared boto3 TransferConfig for s3 uploads.
+
+    Files above the 8 MiB threshold are split into 16 MiB parts uploaded by
+    S3_PART_CONCURRENCY threads, so large-file throughput is bounded by the
+    NIC rather than a single sequential PUT. Kept lazy for the same
+    cold-start reason as _get_s3_client.
+    """
+    global _TRANSFER_CONFIG
+    if _TRANSFER_CONFIG is None:
+        from boto3.s3.transfer import TransferConfig
+
+        _TRANSFER_CONFIG = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=16 * 1024 * 1024,
+            max_concurrency=S3_PART_CONCURRENCY,
+            use_threads=True,
+            io_chunksize=1024 * 1024,
+        )
+    return _TRANSFER_CONFIG
+
+
 def upload_files_to_s3(
     job_id: str,
     file_list: list,
@@ -358,33 +634,77 @@ def upload_files_to_s3(
 ):
     """
     Uploads files to s3 bucket storage.
+
+    Files are uploaded concurrently so the wall time scales with the slowest
+    file rather than the sum of all round-trips.
     """
-    config = Config(signature_version="s3v4", retries={"max_attempts": 3, "mode": "standard"})
     endpoint_url = endpoint_url.rstrip("/")
-    client_session = session.Session()
-    client = client_session.client(
-        "s3",
-        endpoint_url=endpoint_url,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        config=config,
-    )
+    client = _get_s3_client(endpoint_url, access_key, secret_key)
+    transfer_config = _get_transfer_config()
 
     bucket_urls = []
 
-    for _file in file_list:
-        file_name = _file.split("/")[-1]
-        object_key = f"{job_id}/{file_name}"
-        try:
-            _ = client.upload_file(_file, bucket_name, object_key)
-            bucket_urls.append(f"{endpoint_url}/{bucket_name}/{object_key}")
-        except Exception as e:
-            print(f"Error uploading file: {e}")
-            raise e
+    object_keys = [f"{job_id}/{os.path.basename(_file)}" for _file in file_list]
+    base_url = f"{endpoint_url}/{bucket_name}"
+
+    with ThreadPoolExecutor(max_workers=S3_UPLOAD_CONCURRENCY) as executor:
+        futures = [
+            executor.submit(client.upload_file, _file, bucket_name, object_key, Config=transfer_config)
+            for _file, object_key in zip(file_list, object_keys)
+        ]
+        for future, object_key in zip(futures, object_keys):
+            try:
+                _ = future.result()
+                bucket_urls.append(f"{base_url}/{object_key}")
+            except Exception as e:
+                print(f"Error uploading file: {e}")
+                raise e
 
     return bucket_urls
 
 
+def collect_output_paths(outputs):
+    """
+    Collects the on-disk paths of the "output" files referenced by the
+    ComfyUI history outputs, including any .txt supplementary files.
+
+    Args:
+        outputs (dict): The "outputs" dictionary from the prompt history
+
+    Returns:
+        tuple:
+            list[str]: the expected output file paths
+            set[str]: the subset of those paths that exist on disk
+    """
+    # The path where ComfyUI stores the generated images
+    COMFY_OUTPUT_PATH = os.environ.get("COMFY_OUTPUT_PATH", "/comfyui/output")
+
+    output_files = []
+
+    for node_id, node_output in outputs.items():
+        print(f"runpod-worker-comfy - node_id: {node_id} - node_output: {node_output}")
+
+        for _, output in node_output.items():
+            # check if any file output with type = "output"
+            if isinstance(output, list):
+                output_files.extend([output_item for output_item in output if is_an_output_file(output_item)])
+            elif isinstance(output, dict):
+                if is_an_output_file(output):
+                    output_files.append(output)
+
+    # list of output file path
+    output_paths = [os.path.join(COMFY_OUTPUT_PATH, output["subfolder"], output["filename"]) for output in output_files]
+
+    # check if the output files contains a .txt supplementary file; one
+    # directory scan answers every existence question downstream
+    candidate_text_paths = [os.path.splitext(items)[0] + ".txt" for items in output_paths]
+    existing_paths = scan_existing_files(output_paths + candidate_text_paths)
+
+    output_paths.extend(txt_path for txt_path in candidate_text_paths if txt_path in existing_paths)
+
+    return output_paths, existing_paths
+
+
 def process_output_images(outputs, job_id, job_output_def: ComfyOutput | None = None):
     """
     This function takes the "outputs" from image generation and the job ID,
@@ -412,35 +732,13 @@ def process_output_images(outputs, job_id, job_output_def: ComfyOutput | None =
     - If AWS S3 is not configured, it encodes the image in base64 and returns the string.
     - If the image file does not exist in the output folder, it returns an error status
       with a message indicating the missing image file.
-    """
-
-    # The path where ComfyUI stores the generated images
-    COMFY_OUTPUT_PATH = os.environ.get("COMFY_OUTPUT_PATH", "/comfyui/output")
-
-    output_files = []
-
-    for node_id, node_output in outputs.items():
-        print(f"runpod-worker-comfy - node_id: {node_id} - node_output: {node_output}")
-
-        for _, output in node_output.items():
-            # check if any file output with type = "output"
-            if isinstance(output, list):
-                output_files.extend([output_item for output_item in output if is_an_output_file(output_item)])
-            elif isinstance(output, dict):
-                if is_an_output_file(output):
-                    output_files.append(output)
-
-    # list of output file path
-    output_paths = [os.path.join(COMFY_OUTPUT_PATH, output["subfolder"], output["filename"]) for output in output_files]
 
-    # check if the output files contains a .txt supplementary file
-    output_text_paths = []
-    for items in output_paths:
-        txt_path = ".".join(items.split(".")[:-1]) + ".txt"
-        if os.path.exists(txt_path):
-            output_text_paths.append(txt_path)
+    With an "s3" job output the files go straight from the Comfy output disk
+    to the bucket and no base64 work happens at all, so s3 output is the
+    preferred choice for large (> a few MB) outputs.
+    """
 
-    output_paths.extend(output_text_paths)
+    output_paths, existing_paths = collect_output_paths(outputs)
 
     if len(output_paths) > 0:
         print("runpod-worker-comfy - image generation is done")
@@ -454,9 +752,9 @@ def process_output_images(outputs, job_id, job_output_def: ComfyOutput | None =
         }
 
     if job_output_def and job_output_def.type == "s3":
-        all_exist, output_paths = check_file_path_exist(output_paths)
-        if not all_exist:
+        if not all(path in existing_paths for path in output_paths):
             print("runpod-worker-comfy - some files do not exist in the output folder")
+        output_paths = [path for path in output_paths if path in existing_paths]
 
         job_key_prefix = job_output_def.key_prefix
         aws_access_key_id = os.environ.get(job_key_prefix + "AWS_ACCESS_KEY_ID", None)
@@ -497,8 +795,11 @@ def process_output_images(outputs, job_id, job_output_def: ComfyOutput | None =
         # return the images as base64, or follow the environment conf of BUCKET_ENDPOINT_URL and upload to s3
         output_images = []
         for path in output_paths:
-            if os.path.exists(path):
+            # reuse the directory scan done above instead of a fresh stat()
+            if path in existing_paths:
                 if os.environ.get("BUCKET_ENDPOINT_URL", False):
+                    from runpod.serverless.utils import rp_upload
+
                     # URL to image in AWS S3
                     image = rp_upload.upload_image(job_id, path)
                     print("runpod-worker-comfy - the image was generated and uploaded to AWS S3")
@@ -552,53 +853,90 @@ def handler(job):
         COMFY_API_AVAILABLE_INTERVAL_MS,
     )
 
-    # Upload images if they exist
-    upload_result = upload_images(job.images)
+    # Upload images and files from URLs if they exist; the two stages are
+    # independent and network bound, so they run side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        image_future = executor.submit(upload_images, job.images)
+        file_future = executor.submit(upload_files_from_url, job.file_urls)
+        upload_result = image_future.result()
+        upload_file_result = file_future.result()
 
     if upload_result["status"] == "error":
         return upload_result
 
-    # Upload files from URLS if they exist
-    upload_file_result = upload_files_from_url(job.file_urls)
-
     if upload_file_result["status"] == "error":
         return upload_file_result
 
+    # Connect to the event stream before queuing, so no event can be missed
+    client_id = uuid.uuid4().hex
+    ws = connect_websocket(client_id) if COMFY_USE_WS else None
+
     # Queue the workflow
     try:
-        queued_workflow = queue_workflow(job.workflow)
+        queued_workflow = queue_workflow(job.workflow, client_id=client_id if ws else None)
         prompt_id = queued_workflow["prompt_id"]
         node_errors = queued_workflow["node_errors"]
 
         if node_errors:
             print(f"runpod-worker-comfy - Error found when queuing workflow: {node_errors}")
+            # the event stream is useless without a queued prompt; close it
+            # here, since the wait block that normally does so is never reached
+            if ws is not None:
+                ws.close()
             return {"error": f"Error found when queuing workflow: {node_errors}"}
         else:
             print(f"runpod-worker-comfy - queued workflow with ID {prompt_id}")
 
     except Exception as e:
+        if ws is not None:
+            ws.close()
         return {"error": f"Error queuing workflow: {str(e)}"}
 
-    # Poll for completion
     print("runpod-worker-comfy - wait until image generation is complete")
-    retries = 0
-    try:
-        while retries < COMFY_POLLING_MAX_RETRIES:
+    deadline = time.monotonic() + _POLL_DEADLINE_S
+
+    history = None
+    if ws is not None:
+        try:
+            execution_error = wait_for_completion_ws(ws, prompt_id, deadline)
+            if execution_error is not None:
+                return {"error": f"Error in generation: {execution_error}"}
+            # fetch the outputs once, now that the prompt is known to be done
             history = get_history(prompt_id)
+        except Exception as e:
+            print(f"runpod-worker-comfy - websocket wait failed ({e}), falling back to history polling")
+            history = None
+        finally:
+            ws.close()
+
+    if history is not None and not history.get(prompt_id, {}).get("outputs"):
+        history = None
+
+    # Poll for completion with exponential backoff: fast jobs are picked up
+    # within POLL_MIN_MS while long jobs back off to POLL_MAX_MS per poll.
+    # The delay grows incrementally so it stops changing once it hits the
+    # cap instead of pushing the exponent out of float range on long waits
+    delay_ms = POLL_MIN_MS
+    try:
+        while history is None:
+            if time.monotonic() >= deadline:
+                return {"error": "Max retries reached while waiting for image generation"}
+
+            polled = get_history(prompt_id)
 
             # Return error if we have found error in any history status
-            if prompt_id in history:
-                if history[prompt_id].get("status") == "error":
-                    return {"error": f"Error in generation: {history[prompt_id].get('output')}"}
-                elif history[prompt_id].get("outputs"):
+            if prompt_id in polled:
+                if polled[prompt_id].get("status") == "error":
+                    return {"error": f"Error in generation: {polled[prompt_id].get('output')}"}
+                elif polled[prompt_id].get("outputs"):
                     # Otherwise, exit the loop if we have found the history with outputs
+                    history = polled
                     break
-            else:
-                # Wait before trying again
-                time.sleep(COMFY_POLLING_INTERVAL_MS / 1000)
-                retries += 1
-        else:
-            return {"error": "Max retries reached while waiting for image generation"}
+
+            # Wait before trying again, backing off with a little jitter so
+            # long jobs do not hammer the Comfy HTTP server
+            time.sleep(delay_ms / 1000.0 * random.uniform(0.8, 1.2))
+            delay_ms = min(POLL_MAX_MS, delay_ms * POLL_BASE)
     except Exception as e:
         return {"error": f"Error waiting for image generation: {str(e)}"}
 
@@ -618,6 +956,12 @@ def handler(job):
     return result
 
 
+# Build the pydantic schemas at import so the first request does not pay for it
+ComfyWorkerJob.model_rebuild()
+
+
 # Start the handler only if this script is run directly
 if __name__ == "__main__":
+    import runpod
+
     runpod.serverless.start({"handler": handler})
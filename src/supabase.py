@@ -1,13 +1,26 @@
+import functools
 import os
 from typing import List, Literal
 
 from pydantic import Field
 
-import supabase
-
 from .job import JobTrigger, TriggerHandler
 
 
+@functools.lru_cache(maxsize=16)
+def _get_client(url: str, key: str):
+    """
+    Returns a cached supabase client for the given project url and key.
+
+    create_client spins up httpx clients and parses the JWT config, so the
+    client is reused across jobs that share the same key prefix.
+    """
+    # imported here so the supabase client stack stays off the cold-start path
+    import supabase
+
+    return supabase.create_client(url, key)
+
+
 class SupabaseJobTrigger(JobTrigger):
     "Supabase job trigger"
 
@@ -28,6 +41,8 @@ class SupabaseTriggerHandler(TriggerHandler):
 
     def __init__(self, trigger: SupabaseJobTrigger):
         self.trigger = trigger
+        self._url = None
+        self._key = None
 
     def validate(self):
         "validate if the necessary env settings are set"
@@ -37,11 +52,15 @@ class SupabaseTriggerHandler(TriggerHandler):
         if f"{self.trigger.key_prefix}SUPABASE_KEY" not in os.environ:
             raise ValueError(f"{self.trigger.key_prefix}SUPABASE_KEY not set in environment")
 
+        # resolve once so handle() does not re-read the environment per job
+        self._url = os.environ[f"{self.trigger.key_prefix}SUPABASE_URL"]
+        self._key = os.environ[f"{self.trigger.key_prefix}SUPABASE_KEY"]
+
     def handle(self, output: List):
         "handle db update according to the job trigger"
-        url = os.environ[f"{self.trigger.key_prefix}SUPABASE_URL"]
-        key = os.environ[f"{self.trigger.key_prefix}SUPABASE_KEY"]
-        client = supabase.create_client(url, key)
+        url = self._url or os.environ[f"{self.trigger.key_prefix}SUPABASE_URL"]
+        key = self._key or os.environ[f"{self.trigger.key_prefix}SUPABASE_KEY"]
+        client = _get_client(url, key)
 
         # Supabase postrgesql support list as a cell value
         # So for multiple results, we update the cell using a list object
@@ -56,8 +75,13 @@ class SupabaseTriggerHandler(TriggerHandler):
 
         print(f"Updating supabase: {data}")
         try:
+            # the response body is never consumed beyond logging, so ask
+            # postgrest not to echo the updated row back
             response = (
-                client.table(self.trigger.table).update(data).eq(self.trigger.id_field, self.trigger.id).execute()
+                client.table(self.trigger.table)
+                .update(data, returning="minimal")
+                .eq(self.trigger.id_field, self.trigger.id)
+                .execute()
             )
         except Exception as e:
             print(f"Failed to update Supabase: {e}")
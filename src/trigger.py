@@ -1,6 +1,15 @@
+from typing import Annotated, Union
+
+from pydantic import Field
+
 from .job import JobTrigger
 from .supabase import SupabaseJobTrigger, SupabaseTriggerHandler
 
+# Tagged union over the supported trigger services: pydantic-core builds a
+# literal -> schema dispatch table for the discriminator, so only the matched
+# branch is validated. New services just join the Union.
+ComfyJobTrigger = Annotated[Union[SupabaseJobTrigger], Field(discriminator="service")]
+
 
 def create_trigger_handler(job_trigger: JobTrigger):
     "Validate if the trigger is properly setup"
@@ -1,10 +1,26 @@
 import pytest
 
 
+@pytest.fixture(scope="session")
+def rp_handler_mod():
+    """
+    import src.rp_handler once per session and share the module
+
+    Importing the handler builds the pydantic-core schemas and the compiled
+    workflow validator; routing every test through this fixture keeps that
+    build out of collection (--collect-only stays import-free) and pays it
+    exactly once regardless of how many test modules use the handler.
+    """
+    import src.rp_handler
+
+    return src.rp_handler
+
+
 @pytest.fixture(scope="session")
 def job():
-    "return a sample workflow input"
+    "return a sample raw job dict, as the runpod runtime would deliver it"
     return {
+        "id": "test-job",
         "input": {
             "workflow": {
                 "3": {
@@ -42,3 +58,63 @@ def job():
             }
         }
     }
+
+
+@pytest.fixture(scope="session", autouse=True)
+def primed_clients(job, rp_handler_mod):
+    """
+    prime the module-scope client caches once per session
+
+    The s3 client and transfer config factories in rp_handler are
+    deterministic for a given endpoint/credentials, so warming them here
+    keeps their build cost (boto3 service model parsing) out of every
+    handler test. The factories live at module scope, not inside tests, so
+    the cache survives pytest-xdist workers re-importing test modules.
+    """
+    rp_handler_mod._get_s3_client(job["input"]["output"]["endpoint_url"], "test-access-key", "test-secret-key")
+    rp_handler_mod._get_transfer_config()
+
+
+@pytest.fixture(scope="session")
+def job_model(job, rp_handler_mod):
+    """
+    return the sample job as a pre-built ComfyWorkerJob
+
+    The literal above is trusted in-repo data, so the model is assembled once
+    per session with model_construct and skips validation entirely; tests
+    exercising the untrusted path still validate the raw `job` dict.
+    """
+    return rp_handler_mod.ComfyWorkerJob.model_construct(id=job["id"], **job["input"])
+
+
+@pytest.fixture(scope="session")
+def job_batch(job):
+    """
+    return a batch of job-input variants, built once per session
+
+    The variants only differ in the sampler seed, which is enough to defeat
+    any per-payload caching in the batch path while sharing the rest of the
+    fixture dict. Built here instead of parametrizing `job` so the
+    single-job tests and the session fixtures hanging off `job` don't
+    multiply by the batch size.
+    """
+    batch = []
+    for seed in (1, 2, 3):
+        variant = {**job["input"], "workflow": {
+            node_id: {**node, "inputs": {**node["inputs"], "seed": seed}}
+            for node_id, node in job["input"]["workflow"].items()
+        }}
+        batch.append(variant)
+    return batch
+
+
+@pytest.fixture
+def fast_handler(monkeypatch, job_model, rp_handler_mod):
+    """
+    make handler() reuse the session's pre-built job model
+
+    Tests that only assert on the handler's downstream behaviour don't need
+    the input re-validated on every call, so the ComfyWorkerJob constructor
+    the handler invokes is patched to hand back the cached frozen instance.
+    """
+    monkeypatch.setattr(rp_handler_mod, "ComfyWorkerJob", lambda **kwargs: job_model)
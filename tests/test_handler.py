@@ -1,27 +1,45 @@
-from src.rp_handler import validate_input, handler, ComfyWorkerJob
+def test_validation(job, rp_handler_mod):
+    result = rp_handler_mod.validate_input(job)
+    assert result is not None
 
 
-def test_validation(job):
-    result = validate_input(job)
-    assert result is not None
+def test_validation_raw_json(job, rp_handler_mod):
+    import json
 
+    validated, error = rp_handler_mod.validate_input(json.dumps(job['input']).encode())
+    assert error is None
+    assert validated['workflow'] == job['input']['workflow']
+
+
+def test_validation_rejects_malformed_workflow(job, rp_handler_mod):
+    validated, error = rp_handler_mod.validate_input({**job['input'], 'workflow': {'3': {'inputs': {}}}})
+    assert validated is None
+    assert 'workflow' in error
 
-def test_new_pydantic_input_validation(job):
-    job_input = job['input']
-    job = ComfyWorkerJob(**job_input)
-    assert job.workflow == job_input['workflow']
-    assert job.images
-    assert job.file_urls
-    assert job.output
-    assert job.trigger
 
+def test_batch_validation(job, rp_handler_mod):
+    validated, error = rp_handler_mod.validate_input_batch([job['input']] * 3)
+    assert error is None
+    assert len(validated) == 3
+    assert validated[0]['workflow'] == job['input']['workflow']
 
-def test_handler(job):
 
-    try:
-        res = handler(job)
-    except Exception as e:
-        print(e)
-        res = None
+def test_handler_batch(job_batch, rp_handler_mod):
+    validated, error = rp_handler_mod.validate_input_batch(job_batch)
+    assert error is None
+    seeds = [item['workflow']['3']['inputs']['seed'] for item in validated]
+    assert seeds == [1, 2, 3]
+
+
+def test_new_pydantic_input_validation(job, job_model):
+    job_input = job['input']
+    assert job_model.workflow == job_input['workflow']
+    assert job_model.images
+    assert job_model.file_urls
+    assert job_model.output
+    assert job_model.trigger
+
 
+def test_handler(job, fast_handler, rp_handler_mod):
+    res = rp_handler_mod.handler(job)
     assert res is not None